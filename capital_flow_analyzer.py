@@ -6,6 +6,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+# 股票代码首位与交易所的对应关系
+MARKET_BY_FIRST_DIGIT = {'6': 'sh', '9': 'sh', '0': 'sz', '3': 'sz', '4': 'bj', '8': 'bj'}
+
 
 class CapitalFlowAnalyzer:
     def __init__(self):
@@ -32,9 +35,15 @@ class CapitalFlowAnalyzer:
             # 从akshare获取数据
             concept_data = ak.stock_fund_flow_concept(symbol=period)
 
+            # 阶段涨跌幅按列整体解析，避免逐行解析百分比字符串
+            if "阶段涨跌幅" in concept_data.columns:
+                change_percents = self._parse_percent_column(concept_data["阶段涨跌幅"]).tolist()
+            else:
+                change_percents = [0.0] * len(concept_data)
+
             # 处理数据
             result = []
-            for _, row in concept_data.iterrows():
+            for row, change_percent in zip(concept_data.to_dict("records"), change_percents):
                 try:
                     # 列名可能有所不同，所以我们使用灵活的方法
                     item = {
@@ -42,7 +51,7 @@ class CapitalFlowAnalyzer:
                         "sector": row.get("行业", ""),
                         "company_count": int(row.get("公司家数", 0)),
                         "sector_index": float(row.get("行业指数", 0)),
-                        "change_percent": self._parse_percent(row.get("阶段涨跌幅", "0%")),
+                        "change_percent": change_percent,
                         "inflow": float(row.get("流入资金", 0)),
                         "outflow": float(row.get("流出资金", 0)),
                         "net_flow": float(row.get("净额", 0))
@@ -78,30 +87,36 @@ class CapitalFlowAnalyzer:
             # 从akshare获取数据
             stock_data = ak.stock_individual_fund_flow_rank(indicator=period)
 
+            # 根据不同时间段设置列名前缀，并一次性将中文列名转换为英文字段名
+            period_prefix = "" if period == "今日" else f"{period}"
+            flow_columns = {
+                "涨跌幅": "change_percent",
+                "主力净流入-净额": "main_net_inflow",
+                "主力净流入-净占比": "main_net_inflow_percent",
+                "超大单净流入-净额": "super_large_net_inflow",
+                "超大单净流入-净占比": "super_large_net_inflow_percent",
+                "大单净流入-净额": "large_net_inflow",
+                "大单净流入-净占比": "large_net_inflow_percent",
+                "中单净流入-净额": "medium_net_inflow",
+                "中单净流入-净占比": "medium_net_inflow_percent",
+                "小单净流入-净额": "small_net_inflow",
+                "小单净流入-净占比": "small_net_inflow_percent"
+            }
+            column_map = {"序号": "rank", "代码": "code", "名称": "name", "最新价": "price"}
+            column_map.update({f"{period_prefix}{column}": key for column, key in flow_columns.items()})
+            records = stock_data.rename(columns=column_map).to_dict("records")
+
             # 处理数据
             result = []
-            for _, row in stock_data.iterrows():
+            for row in records:
                 try:
-                    # 根据不同时间段设置列名前缀
-                    period_prefix = "" if period == "今日" else f"{period}"
-
                     item = {
-                        "rank": int(row.get("序号", 0)),
-                        "code": row.get("代码", ""),
-                        "name": row.get("名称", ""),
-                        "price": float(row.get("最新价", 0)),
-                        "change_percent": float(row.get(f"{period_prefix}涨跌幅", 0)),
-                        "main_net_inflow": float(row.get(f"{period_prefix}主力净流入-净额", 0)),
-                        "main_net_inflow_percent": float(row.get(f"{period_prefix}主力净流入-净占比", 0)),
-                        "super_large_net_inflow": float(row.get(f"{period_prefix}超大单净流入-净额", 0)),
-                        "super_large_net_inflow_percent": float(row.get(f"{period_prefix}超大单净流入-净占比", 0)),
-                        "large_net_inflow": float(row.get(f"{period_prefix}大单净流入-净额", 0)),
-                        "large_net_inflow_percent": float(row.get(f"{period_prefix}大单净流入-净占比", 0)),
-                        "medium_net_inflow": float(row.get(f"{period_prefix}中单净流入-净额", 0)),
-                        "medium_net_inflow_percent": float(row.get(f"{period_prefix}中单净流入-净占比", 0)),
-                        "small_net_inflow": float(row.get(f"{period_prefix}小单净流入-净额", 0)),
-                        "small_net_inflow_percent": float(row.get(f"{period_prefix}小单净流入-净占比", 0))
+                        "rank": int(row.get("rank", 0)),
+                        "code": row.get("code", ""),
+                        "name": row.get("name", ""),
+                        "price": float(row.get("price", 0))
                     }
+                    item.update({key: float(row.get(key, 0)) for key in flow_columns.values()})
                     result.append(item)
                 except Exception as e:
                     self.logger.warning(f"Error processing row in individual fund flow rank: {str(e)}")
@@ -130,14 +145,9 @@ class CapitalFlowAnalyzer:
                 if (datetime.now() - cache_time).total_seconds() < 3600:
                     return cached_data
 
-            # 如果未提供市场类型，则根据股票代码判断
+            # 如果未提供市场类型，则根据股票代码首位判断，默认上海
             if not market_type:
-                if stock_code.startswith('6'):
-                    market_type = "sh"
-                elif stock_code.startswith('0') or stock_code.startswith('3'):
-                    market_type = "sz"
-                else:
-                    market_type = "sh"  # Default to Shanghai
+                market_type = MARKET_BY_FIRST_DIGIT.get(stock_code[:1], "sh")
 
             # 从akshare获取数据
             flow_data = ak.stock_individual_fund_flow(stock=stock_code, market=market_type)
@@ -292,17 +302,21 @@ class CapitalFlowAnalyzer:
             elif positive_ratio > 0.3:
                 main_force_score += 10
 
+            # 一次遍历统计近期各类订单净流入为正的天数
+            super_large_positive = large_positive = medium_positive = small_positive = 0
+            for item in fund_flow["data"][:recent_days]:
+                if item["super_large_net_inflow"] > 0:
+                    super_large_positive += 1
+                if item["large_net_inflow"] > 0:
+                    large_positive += 1
+                if item["medium_net_inflow"] > 0:
+                    medium_positive += 1
+                if item["small_net_inflow"] > 0:
+                    small_positive += 1
+
             # 计算大单评分（0-30分）
             large_order_score = 0
 
-            # 分析超大单和大单交易
-            recent_super_large = [item["super_large_net_inflow"] for item in
-                                   fund_flow["data"][:recent_days]]
-            recent_large = [item["large_net_inflow"] for item in fund_flow["data"][:recent_days]]
-
-            super_large_positive = sum(1 for x in recent_super_large if x > 0)
-            large_positive = sum(1 for x in recent_large if x > 0)
-
             # 基于超大单的评分
             super_large_ratio = super_large_positive / recent_days if recent_days > 0 else 0
             if super_large_ratio > 0.7:
@@ -324,13 +338,6 @@ class CapitalFlowAnalyzer:
             # 计算小单评分（0-30分）
             small_order_score = 0
 
-            # 分析中单和小单交易
-            recent_medium = [item["medium_net_inflow"] for item in fund_flow["data"][:recent_days]]
-            recent_small = [item["small_net_inflow"] for item in fund_flow["data"][:recent_days]]
-
-            medium_positive = sum(1 for x in recent_medium if x > 0)
-            small_positive = sum(1 for x in recent_small if x > 0)
-
             # 基于中单的评分
             medium_ratio = medium_positive / recent_days if recent_days > 0 else 0
             if medium_ratio > 0.7:
@@ -371,14 +378,10 @@ class CapitalFlowAnalyzer:
                 "error": str(e)
             }
 
-    def _parse_percent(self, percent_str):
-        """将百分比字符串转换为浮点数"""
-        try:
-            if isinstance(percent_str, str) and '%' in percent_str:
-                return float(percent_str.replace('%', ''))
-            return float(percent_str)
-        except (ValueError, TypeError):
-            return 0.0
+    def _parse_percent_column(self, values):
+        """将百分比列整体转换为浮点数，缺失或无法解析的值记为0"""
+        parsed = pd.to_numeric(values.astype(str).str.replace('%', '', regex=False), errors='coerce')
+        return parsed.fillna(0.0).astype(float)
 
     def _generate_mock_concept_fund_flow(self, period):
         """生成模拟概念资金流向数据"""
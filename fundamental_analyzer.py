@@ -6,21 +6,77 @@
 许可证：MIT License
 """
 # fundamental_analyzer.py
+import hashlib
+import os
+import pickle
+import tempfile
+import time
 import akshare as ak
 import pandas as pd
 import numpy as np
 
 
 class FundamentalAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_dir="data/cache/fundamental", cache_ttl=86400):
         """初始化基础分析类"""
         self.data_cache = {}
+        # 财务报表数据按季度更新，落盘缓存后可在多个实例和多次启动间复用
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _fetch_with_cache(self, fetcher, **kwargs):
+        """优先读取内存和磁盘缓存，缓存不存在或过期时才调用akshare接口"""
+        # 参数来自请求，取哈希作为文件名，避免参数中的路径字符影响缓存文件位置
+        params_hash = hashlib.md5(repr(sorted(kwargs.items())).encode('utf-8')).hexdigest()
+        cache_key = f"{fetcher.__name__}_{params_hash}"
+        now = time.time()
+
+        # 检查内存缓存
+        if cache_key in self.data_cache:
+            cache_time, cached_data = self.data_cache[cache_key]
+            if now - cache_time < self.cache_ttl:
+                return cached_data
+
+        # 检查磁盘缓存，以文件修改时间判断是否过期
+        cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
+        if os.path.exists(cache_file):
+            cache_time = os.path.getmtime(cache_file)
+            if now - cache_time < self.cache_ttl:
+                try:
+                    cached_data = pd.read_pickle(cache_file)
+                    self.data_cache[cache_key] = (cache_time, cached_data)
+                    return cached_data
+                except Exception as e:
+                    print(f"读取缓存文件 {cache_file} 出错，重新获取: {str(e)}")
+
+        data = fetcher(**kwargs)
+
+        # 空结果不缓存，避免接口偶发返回空数据后整天无法分析该股票
+        if data.empty:
+            return data
+
+        # 先写临时文件再替换，避免其他worker进程读取到不完整的缓存
+        tmp_file = None
+        try:
+            fd, tmp_file = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            print(f"写入缓存文件 {cache_file} 出错: {str(e)}")
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        self.data_cache[cache_key] = (now, data)
+
+        return data
 
     def get_financial_indicators(self, stock_code):
         """获取财务指标数据"""
         try:
             # 获取基本财务指标
-            financial_data = ak.stock_financial_analysis_indicator(symbol=stock_code,start_year="2022")
+            financial_data = self._fetch_with_cache(ak.stock_financial_analysis_indicator,
+                                                    symbol=stock_code, start_year="2022")
 
             # 获取最新估值指标
             valuation = ak.stock_value_em(symbol=stock_code)
@@ -45,7 +101,7 @@ class FundamentalAnalyzer:
         """获取成长性数据"""
         try:
             # 获取历年财务数据
-            financial_data = ak.stock_financial_abstract(symbol=stock_code)
+            financial_data = self._fetch_with_cache(ak.stock_financial_abstract, symbol=stock_code)
 
             # 计算各项成长率
             revenue = financial_data['营业收入'].astype(float)
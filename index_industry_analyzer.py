@@ -1,14 +1,18 @@
 # index_industry_analyzer.py
+import heapq
 import akshare as ak
 import pandas as pd
 import numpy as np
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 class IndexIndustryAnalyzer:
     def __init__(self, analyzer):
         self.analyzer = analyzer
         self.data_cache = {}
+        # 限制同时访问数据源的线程数，指数和行业分析共用
+        self.request_slots = threading.Semaphore(8)
 
     def analyze_index(self, index_code, limit=30):
         """分析指数整体情况"""
@@ -50,11 +54,10 @@ class IndexIndustryAnalyzer:
 
             # 限制分析的股票数量以提高性能
             if limit and len(stock_list) > limit:
-                # 按权重排序，取前limit只权重最大的股票
-                stock_weights = list(zip(stock_list, weights))
-                stock_weights.sort(key=lambda x: x[1], reverse=True)
-                stock_list = [s[0] for s in stock_weights[:limit]]
-                weights = [s[1] for s in stock_weights[:limit]]
+                # 取前limit只权重最大的股票（部分选择，无需对全部成分股排序）
+                stock_weights = heapq.nlargest(limit, zip(stock_list, weights), key=lambda x: x[1])
+                stock_list = [s[0] for s in stock_weights]
+                weights = [s[1] for s in stock_weights]
 
             # 多线程分析股票
             results = []
@@ -64,7 +67,8 @@ class IndexIndustryAnalyzer:
             def analyze_stock(stock_code, weight):
                 try:
                     # 分析股票
-                    result = self.analyzer.quick_analyze_stock(stock_code)
+                    with self.request_slots:
+                        result = self.analyzer.quick_analyze_stock(stock_code)
                     result['weight'] = weight
 
                     with results_lock:
@@ -162,7 +166,8 @@ class IndexIndustryAnalyzer:
             def analyze_stock(stock_code):
                 try:
                     # 分析股票
-                    result = self.analyzer.quick_analyze_stock(stock_code)
+                    with self.request_slots:
+                        result = self.analyzer.quick_analyze_stock(stock_code)
 
                     with results_lock:
                         results.append(result)
@@ -238,27 +243,31 @@ class IndexIndustryAnalyzer:
             # 限制分析的行业数量
             industries = industries[:limit] if limit else industries
 
-            # 分析各行业情况
-            industry_results = []
-
-            for industry in industries:
+            def analyze_industry_change(industry):
                 try:
                     # 简化分析，只获取基本指标
-                    industry_info = ak.stock_board_industry_hist_em(symbol=industry, period="3m")
+                    with self.request_slots:
+                        industry_info = ak.stock_board_industry_hist_em(symbol=industry, period="3m")
 
                     # 计算行业涨跌幅
                     if not industry_info.empty:
                         latest = industry_info.iloc[0]
                         change = latest['涨跌幅'] if '涨跌幅' in latest.index else 0
 
-                        industry_results.append({
+                        return {
                             "industry": industry,
                             "change": change,
                             "volume": latest['成交量'] if '成交量' in latest.index else 0,
                             "turnover": latest['成交额'] if '成交额' in latest.index else 0
-                        })
+                        }
                 except Exception as e:
                     print(f"分析行业 {industry} 时出错: {str(e)}")
+                return None
+
+            # 并发获取各行业数据，每个行业一次网络请求
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(industries)))) as executor:
+                industry_results = [result for result in executor.map(analyze_industry_change, industries)
+                                    if result is not None]
 
             # 按涨跌幅排序
             industry_results.sort(key=lambda x: x.get('change', 0), reverse=True)
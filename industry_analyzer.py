@@ -44,55 +44,41 @@ class IndustryAnalyzer:
             fund_flow_data = ak.stock_fund_flow_industry(symbol=symbol)
 
             # 打印列名以便调试
-            self.logger.info(f"行业资金流向数据列名: {fund_flow_data.columns.tolist()}")
-
-            # 转换为字典列表
-            result = []
+            self.logger.debug(f"行业资金流向数据列名: {fund_flow_data.columns.tolist()}")
 
+            # 按列整体转换类型后再转换为字典列表，避免逐行iterrows
             if symbol == "即时":
-                for _, row in fund_flow_data.iterrows():
-                    try:
-                        # 安全地将值转换为对应的类型
-                        item = {
-                            "rank": self._safe_int(row["序号"]),
-                            "industry": str(row["行业"]),
-                            "index": self._safe_float(row["行业指数"]),
-                            "change": self._safe_percent(row["行业-涨跌幅"]),
-                            "inflow": self._safe_float(row["流入资金"]),
-                            "outflow": self._safe_float(row["流出资金"]),
-                            "netFlow": self._safe_float(row["净额"]),
-                            "companyCount": self._safe_int(row["公司家数"])
-                        }
-
-                        # 添加领涨股相关数据，如果存在
-                        if "领涨股" in row:
-                            item["leadingStock"] = str(row["领涨股"])
-                        if "领涨股-涨跌幅" in row:
-                            item["leadingStockChange"] = self._safe_percent(row["领涨股-涨跌幅"])
-                        if "当前价" in row:
-                            item["leadingStockPrice"] = self._safe_float(row["当前价"])
-
-                        result.append(item)
-                    except Exception as e:
-                        self.logger.warning(f"处理行业资金流向数据行时出错: {str(e)}")
-                        continue
+                columns = {
+                    "rank": self._safe_int_column(fund_flow_data["序号"]),
+                    "industry": fund_flow_data["行业"].astype(str),
+                    "index": self._safe_float_column(fund_flow_data["行业指数"]),
+                    "change": self._safe_percent_column(fund_flow_data["行业-涨跌幅"]),
+                    "inflow": self._safe_float_column(fund_flow_data["流入资金"]),
+                    "outflow": self._safe_float_column(fund_flow_data["流出资金"]),
+                    "netFlow": self._safe_float_column(fund_flow_data["净额"]),
+                    "companyCount": self._safe_int_column(fund_flow_data["公司家数"])
+                }
+
+                # 添加领涨股相关数据，如果存在
+                if "领涨股" in fund_flow_data.columns:
+                    columns["leadingStock"] = fund_flow_data["领涨股"].astype(str)
+                if "领涨股-涨跌幅" in fund_flow_data.columns:
+                    columns["leadingStockChange"] = self._safe_percent_column(fund_flow_data["领涨股-涨跌幅"])
+                if "当前价" in fund_flow_data.columns:
+                    columns["leadingStockPrice"] = self._safe_float_column(fund_flow_data["当前价"])
             else:
-                for _, row in fund_flow_data.iterrows():
-                    try:
-                        item = {
-                            "rank": self._safe_int(row["序号"]),
-                            "industry": str(row["行业"]),
-                            "companyCount": self._safe_int(row["公司家数"]),
-                            "index": self._safe_float(row["行业指数"]),
-                            "change": self._safe_percent(row["阶段涨跌幅"]),
-                            "inflow": self._safe_float(row["流入资金"]),
-                            "outflow": self._safe_float(row["流出资金"]),
-                            "netFlow": self._safe_float(row["净额"])
-                        }
-                        result.append(item)
-                    except Exception as e:
-                        self.logger.warning(f"处理行业资金流向数据行时出错: {str(e)}")
-                        continue
+                columns = {
+                    "rank": self._safe_int_column(fund_flow_data["序号"]),
+                    "industry": fund_flow_data["行业"].astype(str),
+                    "companyCount": self._safe_int_column(fund_flow_data["公司家数"]),
+                    "index": self._safe_float_column(fund_flow_data["行业指数"]),
+                    "change": self._safe_percent_column(fund_flow_data["阶段涨跌幅"]),
+                    "inflow": self._safe_float_column(fund_flow_data["流入资金"]),
+                    "outflow": self._safe_float_column(fund_flow_data["流出资金"]),
+                    "netFlow": self._safe_float_column(fund_flow_data["净额"])
+                }
+
+            result = pd.DataFrame(columns).to_dict("records")
 
             # 缓存结果
             self.data_cache[cache_key] = (datetime.now(), result)
@@ -115,29 +101,23 @@ class IndustryAnalyzer:
         except:
             return 0.0
 
-    def _safe_int(self, value):
-        """安全地将值转换为整数"""
-        try:
-            if pd.isna(value):
-                return 0
-            return int(value)
-        except:
-            return 0
-
-    def _safe_percent(self, value):
-        """安全地将百分比值转换为字符串格式"""
-        try:
-            if pd.isna(value):
-                return "0.00"
+    def _safe_float_column(self, values):
+        """按列安全地将值转换为浮点数，规则与_safe_float一致"""
+        return pd.to_numeric(values, errors='coerce').fillna(0.0).astype(float)
 
-            # 如果是字符串并包含%，移除%符号
-            if isinstance(value, str) and "%" in value:
-                return value.replace("%", "")
+    def _safe_int_column(self, values):
+        """按列安全地将值转换为整数，缺失或无法转换的值记为0"""
+        numeric = pd.to_numeric(values, errors='coerce').replace([np.inf, -np.inf], np.nan)
+        return numeric.fillna(0).astype(int)
 
-            # 如果是数值，直接转换成字符串
-            return str(float(value))
-        except:
-            return "0.00"
+    def _safe_percent_column(self, values):
+        """按列安全地将百分比值转换为字符串格式，缺失或无法转换的值记为0.00"""
+        text = values.astype(str)
+        # 字符串中带%的直接去掉%符号，其余按数值转换成字符串
+        has_percent = text.str.contains("%", regex=False)
+        numeric = pd.to_numeric(values.where(~has_percent), errors='coerce').astype(float)
+        result = numeric.astype(str).where(numeric.notna(), "0.00")
+        return result.where(~has_percent, text.str.replace("%", "", regex=False))
 
     def _get_industry_code(self, industry_name):
         """获取行业名称对应的板块代码"""
@@ -148,11 +128,8 @@ class IndustryAnalyzer:
                 industry_list = ak.stock_board_industry_name_em()
 
                 # 创建行业名称到代码的映射
-                for _, row in industry_list.iterrows():
-                    if '板块名称' in industry_list.columns and '板块代码' in industry_list.columns:
-                        name = row['板块名称']
-                        code = row['板块代码']
-                        self.industry_code_map[name] = code
+                if '板块名称' in industry_list.columns and '板块代码' in industry_list.columns:
+                    self.industry_code_map = dict(zip(industry_list['板块名称'], industry_list['板块代码']))
 
                 self.logger.info(f"成功获取到 {len(self.industry_code_map)} 个行业代码映射")
 
@@ -211,7 +188,7 @@ class IndustryAnalyzer:
                         raise ValueError(f"无法找到行业 '{industry}' 对应的代码")
 
                 # 打印列名以便调试
-                self.logger.info(f"行业成分股数据列名: {stocks.columns.tolist()}")
+                self.logger.debug(f"行业成分股数据列名: {stocks.columns.tolist()}")
 
                 # 转换为字典列表
                 if not stocks.empty:
@@ -457,17 +434,19 @@ class IndustryAnalyzer:
             # 限制分析的行业数量
             industries = industries[:limit] if limit else industries
 
+            # 一次性建立行业名称到板块代码的映射（同名取第一条），避免每个行业都遍历整张表
+            industry_codes = {}
+            if '板块代码' in industry_data.columns:
+                for name, code in zip(industry_data['板块名称'], industry_data['板块代码']):
+                    industry_codes.setdefault(name, code)
+
             # 分析各行业情况
             industry_results = []
 
             for industry in industries:
                 try:
                     # 尝试获取行业板块代码
-                    industry_code = None
-                    for _, row in industry_data.iterrows():
-                        if row['板块名称'] == industry:
-                            industry_code = row['板块代码']
-                            break
+                    industry_code = industry_codes.get(industry)
 
                     if not industry_code:
                         self.logger.warning(f"未找到行业 {industry} 的板块代码")
@@ -100,8 +100,8 @@ class NewsFetcher:
             
             # 打印DataFrame的信息和类型，帮助调试
             logger.info(f"获取的数据形状: {stock_info_global_cls_df.shape}")
-            logger.info(f"数据列: {stock_info_global_cls_df.columns.tolist()}")
-            logger.info(f"数据类型: \n{stock_info_global_cls_df.dtypes}")
+            logger.debug(f"数据列: {stock_info_global_cls_df.columns.tolist()}")
+            logger.debug(f"数据类型: \n{stock_info_global_cls_df.dtypes}")
             
             # 计数器
             total_count = 0
@@ -240,15 +240,24 @@ def start_news_scheduler():
     import threading
     import time
     
+    interval = 600  # 每10分钟获取一次
+
     def _run_scheduler():
+        # 按固定节拍计算下一次执行时间，任务本身的耗时不会累积成时间漂移
+        next_run = time.monotonic()
         while True:
             try:
                 fetch_news_task()
-                # 等待10分钟
-                time.sleep(600)
+                next_run += interval
             except Exception as e:
                 logger.error(f"定时任务执行出错: {str(e)}")
-                time.sleep(60)  # 出错后等待1分钟再试
+                next_run = time.monotonic() + 60  # 出错后等待1分钟再试
+
+            # 任务耗时超过一个周期时跳过错过的节拍，不连续补跑
+            now = time.monotonic()
+            if next_run < now:
+                next_run = now + interval - (now - next_run) % interval
+            time.sleep(next_run - now)
     
     # 创建并启动定时任务线程
     scheduler_thread = threading.Thread(target=_run_scheduler)
@@ -8,6 +8,7 @@
 # risk_monitor.py
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 class RiskMonitor:
@@ -127,9 +128,10 @@ class RiskMonitor:
     def _analyze_trend_risk(self, df):
         """分析趋势风险"""
         # 获取均线数据
-        ma5 = df.iloc[-1]['MA5']
-        ma20 = df.iloc[-1]['MA20']
-        ma60 = df.iloc[-1]['MA60']
+        latest = df.iloc[-1]
+        ma5 = latest['MA5']
+        ma20 = latest['MA20']
+        ma60 = latest['MA60']
 
         # 判断当前趋势
         if ma5 < ma20 < ma60:
@@ -163,11 +165,10 @@ class RiskMonitor:
     def _analyze_reversal_risk(self, df):
         """分析趋势反转风险"""
         # 获取最新指标
-        rsi = df.iloc[-1]['RSI']
-        macd = df.iloc[-1]['MACD']
-        signal = df.iloc[-1]['Signal']
-        price = df.iloc[-1]['close']
-        ma20 = df.iloc[-1]['MA20']
+        latest = df.iloc[-1]
+        rsi = latest['RSI']
+        price = latest['close']
+        ma20 = latest['MA20']
 
         # 判断潜在趋势反转信号
         reversal_signals = 0
@@ -182,11 +183,14 @@ class RiskMonitor:
         else:
             direction = "无明确方向"
 
-        # MACD死叉/金叉
-        if macd > signal and df.iloc[-2]['MACD'] <= df.iloc[-2]['Signal']:
+        # MACD死叉/金叉：对整条序列一次性计算交叉点，再取最新一天的结果
+        macd_diff = df['MACD'].to_numpy(dtype=float) - df['Signal'].to_numpy(dtype=float)
+        golden_cross = (macd_diff[1:] > 0) & (macd_diff[:-1] <= 0)
+        death_cross = (macd_diff[1:] < 0) & (macd_diff[:-1] >= 0)
+        if len(golden_cross) > 0 and golden_cross[-1]:
             reversal_signals += 1
             direction = "向上"
-        elif macd < signal and df.iloc[-2]['MACD'] >= df.iloc[-2]['Signal']:
+        elif len(death_cross) > 0 and death_cross[-1]:
             reversal_signals += 1
             direction = "向下"
 
@@ -217,9 +221,13 @@ class RiskMonitor:
 
     def _analyze_volume_risk(self, df):
         """分析成交量风险"""
+        # 一次性取出成交量和收盘价数组，只需最近20日均量而无需计算整条滚动均线
+        volume = df['volume'].to_numpy(dtype=float)
+        close = df['close'].to_numpy(dtype=float)
+
         # 计算成交量变化
-        recent_volume = df.iloc[-1]['volume']
-        avg_volume = df['volume'].rolling(window=20).mean().iloc[-1]
+        recent_volume = volume[-1]
+        avg_volume = volume[-20:].mean() if len(volume) >= 20 else np.nan
         volume_ratio = recent_volume / avg_volume
 
         # 判断成交量模式
@@ -240,8 +248,8 @@ class RiskMonitor:
             score = 20  # 低风险
 
         # 价格与成交量背离分析
-        price_change = (df.iloc[-1]['close'] - df.iloc[-5]['close']) / df.iloc[-5]['close']
-        volume_change = (recent_volume - df.iloc[-5]['volume']) / df.iloc[-5]['volume']
+        price_change = (close[-1] - close[-5]) / close[-5]
+        volume_change = (recent_volume - volume[-5]) / volume[-5]
 
         if price_change > 0.05 and volume_change < -0.3:
             pattern = "价量背离(价格上涨但量能萎缩)"
@@ -271,16 +279,18 @@ class RiskMonitor:
             total_weight = 0
             weighted_risk_score = 0
 
-            for stock in portfolio:
-                stock_code = stock.get('stock_code')
-                weight = stock.get('weight', 1)
-                market_type = stock.get('market_type', 'A')
+            holdings = [stock for stock in portfolio if stock.get('stock_code')]
 
-                if not stock_code:
-                    continue
+            # 并行分析各只股票的风险（耗时主要在行情数据的网络请求上）
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(holdings)))) as executor:
+                risks = list(executor.map(
+                    lambda stock: self.analyze_stock_risk(stock['stock_code'], stock.get('market_type', 'A')),
+                    holdings
+                ))
 
-                # 分析股票风险
-                risk = self.analyze_stock_risk(stock_code, market_type)
+            for stock, risk in zip(holdings, risks):
+                stock_code = stock['stock_code']
+                weight = stock.get('weight', 1)
                 stock_risks[stock_code] = risk
 
                 # 计算加权风险分数
@@ -21,6 +21,9 @@ from logging.handlers import RotatingFileHandler
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+# 模块级随机数生成器，所有情景模拟共用，避免每次调用重新初始化
+_rng = np.random.default_rng()
+
 class ScenarioPredictor:
     def __init__(self, analyzer, openai_api_key=None, openai_model=None):
         self.analyzer = analyzer
@@ -39,10 +42,6 @@ class ScenarioPredictor:
             # 获取股票信息
             stock_info = self.analyzer.get_stock_info(stock_code)
 
-            # 计算基础数据
-            current_price = df.iloc[-1]['close']
-            avg_volatility = df['Volatility'].mean()
-
             # 根据历史波动率计算情景
             scenarios = self._calculate_scenarios(df, days)
 
@@ -59,18 +58,19 @@ class ScenarioPredictor:
 
     def _calculate_scenarios(self, df, days):
         """基于历史数据计算三种情景的价格预测"""
-        current_price = df.iloc[-1]['close']
+        latest = df.iloc[-1]
+        current_price = latest['close']
 
         # 计算历史波动率和移动均线
         volatility = df['Volatility'].mean() / 100  # 转换为小数
         daily_volatility = volatility / np.sqrt(252)  # 转换为日波动率
-        ma20 = df.iloc[-1]['MA20']
-        ma60 = df.iloc[-1]['MA60']
+        ma20 = latest['MA20']
+        ma60 = latest['MA60']
 
         # 计算乐观情景（上涨至压力位或突破）
         optimistic_return = 0.15  # 15%上涨
-        if df.iloc[-1]['BB_upper'] > current_price:
-            optimistic_target = df.iloc[-1]['BB_upper'] * 1.05  # 突破上轨5%
+        if latest['BB_upper'] > current_price:
+            optimistic_target = latest['BB_upper'] * 1.05  # 突破上轨5%
         else:
             optimistic_target = current_price * (1 + optimistic_return)
 
@@ -79,37 +79,19 @@ class ScenarioPredictor:
 
         # 计算悲观情景（下跌至支撑位或跌破）
         pessimistic_return = -0.12  # 12%下跌
-        if df.iloc[-1]['BB_lower'] < current_price:
-            pessimistic_target = df.iloc[-1]['BB_lower'] * 0.95  # 跌破下轨5%
+        if latest['BB_lower'] < current_price:
+            pessimistic_target = latest['BB_lower'] * 0.95  # 跌破下轨5%
         else:
             pessimistic_target = current_price * (1 + pessimistic_return)
 
-        # 计算预期时间
-        time_periods = np.arange(1, days + 1)
-
         # 生成乐观路径
-        opt_path = [current_price]
-        for _ in range(days):
-            daily_return = (optimistic_target / current_price) ** (1 / days) - 1
-            random_component = np.random.normal(0, daily_volatility)
-            new_price = opt_path[-1] * (1 + daily_return + random_component / 2)
-            opt_path.append(new_price)
+        opt_path = self._simulate_path(current_price, optimistic_target, days, daily_volatility, 0.5)
 
         # 生成中性路径
-        neu_path = [current_price]
-        for _ in range(days):
-            daily_return = (neutral_target / current_price) ** (1 / days) - 1
-            random_component = np.random.normal(0, daily_volatility)
-            new_price = neu_path[-1] * (1 + daily_return + random_component)
-            neu_path.append(new_price)
+        neu_path = self._simulate_path(current_price, neutral_target, days, daily_volatility, 1.0)
 
         # 生成悲观路径
-        pes_path = [current_price]
-        for _ in range(days):
-            daily_return = (pessimistic_target / current_price) ** (1 / days) - 1
-            random_component = np.random.normal(0, daily_volatility)
-            new_price = pes_path[-1] * (1 + daily_return + random_component / 2)
-            pes_path.append(new_price)
+        pes_path = self._simulate_path(current_price, pessimistic_target, days, daily_volatility, 0.5)
 
         # 生成日期序列
         start_date = datetime.now()
@@ -135,6 +117,17 @@ class ScenarioPredictor:
             }
         }
 
+    def _simulate_path(self, current_price, target_price, days, daily_volatility, noise_scale):
+        """生成单一情景的价格路径（向量化）"""
+        # 每日目标收益率恒定，只有随机扰动逐日变化，
+        # 因此逐日复利等价于一次累积乘积，无需逐日循环
+        if days <= 0:
+            return [current_price]
+        daily_return = (target_price / current_price) ** (1 / days) - 1
+        random_component = _rng.normal(0, daily_volatility, days)
+        growth = np.cumprod(1 + daily_return + random_component * noise_scale)
+        return [current_price] + (current_price * growth).tolist()
+
     def _generate_ai_analysis(self, stock_code, stock_info, df, scenarios):
         """使用AI生成各情景的分析说明，包含风险和机会因素"""
         try:
@@ -142,13 +135,14 @@ class ScenarioPredictor:
             openai.api_base = self.openai_api_url
     
             # 提取关键数据
-            current_price = df.iloc[-1]['close']
-            ma5 = df.iloc[-1]['MA5']
-            ma20 = df.iloc[-1]['MA20']
-            ma60 = df.iloc[-1]['MA60']
-            rsi = df.iloc[-1]['RSI']
-            macd = df.iloc[-1]['MACD']
-            signal = df.iloc[-1]['Signal']
+            latest = df.iloc[-1]
+            current_price = latest['close']
+            ma5 = latest['MA5']
+            ma20 = latest['MA20']
+            ma60 = latest['MA60']
+            rsi = latest['RSI']
+            macd = latest['MACD']
+            signal = latest['Signal']
     
             # 构建提示词，增加对风险和机会因素的要求
             prompt = f"""分析股票{stock_code}（{stock_info.get('股票名称', '未知')}）的三种市场情景:
@@ -12,17 +12,94 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+import re
+import pickle
+import tempfile
 import requests
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import logging
 import math
+import functools
 import json
 import threading
 
 # 线程局部存储
 thread_local = threading.local()
 
+# 共享HTTP会话，复用连接池，避免每次请求重新建立TCP/TLS连接
+# 对限流和服务端临时错误的GET请求按指数退避自动重试
+http_session = requests.Session()
+_http_retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=["GET"])
+_http_adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=_http_retry)
+http_session.mount('https://', _http_adapter)
+http_session.mount('http://', _http_adapter)
+
+# 保护代码名称映射的首次加载，避免并发扫描时多个线程重复下载
+_code_name_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_code_name_map(trade_date):
+    """加载A股代码到名称的映射，trade_date变化时旧映射自动淘汰"""
+    import akshare as ak
+
+    stock_name = ak.stock_info_a_code_name()
+
+    # 兼容不同版本akshare返回的列名
+    possible_code_columns = ['代码', 'code', 'symbol', '股票代码', 'stock_code']
+    possible_name_columns = ['名称', 'name', '股票名称', 'stock_name']
+
+    code_col = next((col for col in possible_code_columns if col in stock_name.columns), None)
+    name_col = next((col for col in possible_name_columns if col in stock_name.columns), None)
+
+    if not code_col or not name_col:
+        raise ValueError(f"股票信息DataFrame结构不符合预期: {stock_name.columns.tolist()}")
+
+    return dict(zip(stock_name[code_col], stock_name[name_col]))
+
+
+def get_code_name_map():
+    """获取A股代码到名称的映射，所有分析器实例共享，每天刷新一次"""
+    with _code_name_lock:
+        return _load_code_name_map(datetime.now().strftime('%Y-%m-%d'))
+
+
+# A股代码格式：6位数字
+A_SHARE_CODE_PATTERN = re.compile(r'\d{6}')
+
+
+def normalize_stock_codes(codes, market_type='A'):
+    """批量规范化股票代码：去除空白、去重并保持原有顺序，A股去掉sh/sz/bj等交易所前后缀"""
+    codes = pd.Series(list(codes), dtype=object).dropna().astype(str).str.strip()
+    codes = codes[codes != '']
+
+    if market_type == 'A' and not codes.empty:
+        # 兼容 sh600000 / SH.600000 / 600000.SH 等写法
+        digits = codes.str.upper().str.extract(r'^(?:SH|SZ|BJ)?\.?(\d{6})(?:\.(?:SH|SZ|BJ))?$', expand=False)
+        codes = digits.fillna(codes)
+
+    return codes.drop_duplicates().tolist()
+
+
+def filter_known_stock_codes(codes, market_type='A'):
+    """在发起网络请求前剔除不存在的A股代码，返回(有效代码, 未知代码)；映射加载失败时不做过滤"""
+    if market_type != 'A':
+        return list(codes), []
+
+    try:
+        known_codes = get_code_name_map()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"加载A股代码列表失败，跳过代码校验: {str(e)}")
+        return list(codes), []
+
+    valid, unknown = [], []
+    for code in codes:
+        (valid if code in known_codes else unknown).append(code)
+    return valid, unknown
+
 
 class StockAnalyzer:
     """
@@ -58,6 +135,10 @@ class StockAnalyzer:
         # 添加缓存初始化
         self.data_cache = {}
 
+        # A股日线的本地磁盘缓存目录
+        self.kline_cache_dir = os.path.join('data', 'kline')
+        os.makedirs(self.kline_cache_dir, exist_ok=True)
+
         # JSON匹配标志
         self.json_match_flag = True
     def get_stock_data(self, stock_code, market_type='A', start_date=None, end_date=None):
@@ -75,7 +156,7 @@ class StockAnalyzer:
             # If 'date' column exists but is not datetime, convert it
             if 'date' in result.columns and not pd.api.types.is_datetime64_any_dtype(result['date']):
                 try:
-                    result['date'] = pd.to_datetime(result['date'])
+                    result['date'] = pd.to_datetime(result['date'], format='ISO8601', cache=True)
                 except Exception as e:
                     self.logger.warning(f"无法将日期列转换为datetime格式: {str(e)}")
             return result
@@ -88,51 +169,25 @@ class StockAnalyzer:
         try:
             # 根据市场类型获取数据
             if market_type == 'A':
-                df = ak.stock_zh_a_hist(
-                    symbol=stock_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust="qfq"
-                )
-            elif market_type == 'HK':
-                df = ak.stock_hk_daily(
-                    symbol=stock_code,
-                    adjust="qfq"
-                )
-            elif market_type == 'US':
-                df = ak.stock_us_hist(
-                    symbol=stock_code,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust="qfq"
-                )
+                # A股日线使用本地磁盘缓存，只增量获取新的K线
+                result = self._get_a_share_history(stock_code, start_date, end_date)
             else:
-                raise ValueError(f"不支持的市场类型: {market_type}")
-
-            # 重命名列名以匹配分析需求
-            df = df.rename(columns={
-                "日期": "date",
-                "开盘": "open",
-                "收盘": "close",
-                "最高": "high",
-                "最低": "low",
-                "成交量": "volume",
-                "成交额": "amount"
-            })
-
-            # 确保日期格式正确
-            df['date'] = pd.to_datetime(df['date'])
-
-            # 数据类型转换
-            numeric_columns = ['open', 'close', 'high', 'low', 'volume']
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-            # 删除空值
-            df = df.dropna()
+                if market_type == 'HK':
+                    df = ak.stock_hk_daily(
+                        symbol=stock_code,
+                        adjust="qfq"
+                    )
+                elif market_type == 'US':
+                    df = ak.stock_us_hist(
+                        symbol=stock_code,
+                        start_date=start_date,
+                        end_date=end_date,
+                        adjust="qfq"
+                    )
+                else:
+                    raise ValueError(f"不支持的市场类型: {market_type}")
 
-            result = df.sort_values('date')
+                result = self._normalize_stock_data(df)
 
             # 缓存原始数据（包含datetime类型）
             self.data_cache[cache_key] = result.copy()
@@ -143,6 +198,111 @@ class StockAnalyzer:
             self.logger.error(f"获取股票数据失败: {e}")
             raise Exception(f"获取股票数据失败: {e}")
 
+    def _normalize_stock_data(self, df):
+        """统一行情数据的列名和类型，并按日期升序排列"""
+        # 重命名列名以匹配分析需求
+        df = df.rename(columns={
+            "日期": "date",
+            "开盘": "open",
+            "收盘": "close",
+            "最高": "high",
+            "最低": "low",
+            "成交量": "volume",
+            "成交额": "amount"
+        })
+
+        # 确保日期格式正确，指定格式避免逐个元素推断格式
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601', cache=True)
+
+        # 数据类型转换
+        numeric_columns = ['open', 'close', 'high', 'low', 'volume']
+        for col in numeric_columns:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        # 删除空值
+        df = df.dropna()
+
+        # akshare返回的日线数据通常已按日期升序排列，仅在乱序时才排序
+        return df if df['date'].is_monotonic_increasing else df.sort_values('date')
+
+    def _get_a_share_history(self, stock_code, start_date, end_date):
+        """
+        获取A股前复权日线数据，使用本地磁盘缓存增量更新
+
+        缓存中记录已获取的起始日期和K线数据，每次只从缓存的倒数第二根K线开始获取新数据。
+        重叠K线的收盘价与缓存不一致时，说明发生了除权除息导致前复权价格整体变化，此时重新获取全部数据。
+        """
+        import akshare as ak
+
+        def fetch(fetch_start):
+            df = ak.stock_zh_a_hist(
+                symbol=stock_code,
+                start_date=fetch_start,
+                end_date=end_date,
+                adjust="qfq"
+            )
+            return self._normalize_stock_data(df)
+
+        # 代码会拼入缓存文件路径，非6位数字的代码不使用磁盘缓存，防止路径穿越
+        if not A_SHARE_CODE_PATTERN.fullmatch(str(stock_code)):
+            return fetch(start_date)
+
+        start_ts = pd.Timestamp(start_date)
+        end_ts = pd.Timestamp(end_date)
+        cache_file = os.path.join(self.kline_cache_dir, f"{stock_code}.pkl")
+
+        cached = None
+        if os.path.exists(cache_file):
+            try:
+                cached = pd.read_pickle(cache_file)
+                # 旧版本或损坏的缓存文件结构不符时忽略，稍后由新数据覆盖
+                if (not isinstance(cached, dict) or not isinstance(cached.get('start'), pd.Timestamp)
+                        or not isinstance(cached.get('data'), pd.DataFrame) or 'date' not in cached['data'].columns):
+                    raise ValueError("缓存结构不符合预期")
+            except Exception as e:
+                self.logger.warning(f"读取K线缓存 {cache_file} 出错，重新获取: {str(e)}")
+                cached = None
+
+        cache_start = start_ts
+        if cached is not None and cached['start'] <= start_ts and len(cached['data']) >= 2:
+            cache_start = cached['start']
+            history = cached['data']
+            last_date = history['date'].iloc[-1]
+
+            if last_date > end_ts:
+                # 缓存中已有请求区间之后的K线，区间内的K线均已收盘定型，无需访问网络
+                return history[(history['date'] >= start_ts) & (history['date'] <= end_ts)].reset_index(drop=True)
+
+            # 以倒数第二根K线为重叠点（最后一根可能是盘中未完成的K线）
+            overlap = history.iloc[-2]
+            delta = fetch(overlap['date'].strftime('%Y%m%d'))
+            overlap_close = delta.loc[delta['date'] == overlap['date'], 'close']
+
+            if overlap_close.empty or not np.isclose(overlap_close.iloc[0], overlap['close']):
+                self.logger.info(f"股票 {stock_code} 复权价格发生变化，重新获取全部K线数据")
+                cache_start = start_ts
+                data = fetch(start_date)
+            else:
+                data = pd.concat([history[history['date'] < overlap['date']], delta], ignore_index=True)
+        else:
+            data = fetch(start_date)
+
+        # 先写临时文件再替换，避免并发读取到不完整的缓存
+        # 临时文件名由mkstemp生成，多个gunicorn worker进程同时刷新同一股票也不会互相覆盖
+        tmp_file = None
+        try:
+            fd, tmp_file = tempfile.mkstemp(dir=self.kline_cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'start': cache_start, 'data': data}, f)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            self.logger.warning(f"写入K线缓存 {cache_file} 出错: {str(e)}")
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+        return data[(data['date'] >= start_ts) & (data['date'] <= end_ts)].reset_index(drop=True)
+
     def get_north_flow_history(self, stock_code, start_date=None, end_date=None):
         """获取单个股票的北向资金历史持股数据"""
         try:
@@ -158,16 +318,32 @@ class StockAnalyzer:
             if north_hist_data.empty:
                 return {"history": []}
 
+            # 按列整体取值后再组装，避免逐行构造Series
+            row_count = len(north_hist_data)
+
+            def column_values(name, default, as_float=True):
+                if name not in north_hist_data.columns:
+                    return [default] * row_count
+                column = north_hist_data[name]
+                return column.astype(float).tolist() if as_float else column.tolist()
+
             # 转换为列表格式返回
-            history = []
-            for _, row in north_hist_data.iterrows():
-                history.append({
-                    "date": row.get('日期', ''),
-                    "holding": float(row.get('持股数', 0)) if '持股数' in row else 0,
-                    "ratio": float(row.get('持股比例', 0)) if '持股比例' in row else 0,
-                    "change": float(row.get('持股变动', 0)) if '持股变动' in row else 0,
-                    "market_value": float(row.get('持股市值', 0)) if '持股市值' in row else 0
-                })
+            history = [
+                {
+                    "date": date,
+                    "holding": holding,
+                    "ratio": ratio,
+                    "change": change,
+                    "market_value": market_value
+                }
+                for date, holding, ratio, change, market_value in zip(
+                    column_values('日期', '', as_float=False),
+                    column_values('持股数', 0),
+                    column_values('持股比例', 0),
+                    column_values('持股变动', 0),
+                    column_values('持股市值', 0)
+                )
+            ]
 
             return {"history": history}
         except Exception as e:
@@ -180,10 +356,17 @@ class StockAnalyzer:
 
     def calculate_rsi(self, series, period):
         """计算RSI指标"""
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
+        delta = series.diff().to_numpy()
+
+        # 涨幅和跌幅并排放置，一次累加即可同时得到两者的滚动均值
+        moves = np.column_stack([np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)])
+        csum = np.vstack([np.zeros((1, 2)), np.cumsum(moves, axis=0)])
+
+        means = np.full(moves.shape, np.nan)
+        if len(moves) >= period:
+            means[period - 1:] = (csum[period:] - csum[:-period]) / period
+
+        rs = pd.Series(means[:, 0], index=series.index) / pd.Series(means[:, 1], index=series.index)
         return 100 - (100 / (1 + rs))
 
     def calculate_macd(self, series):
@@ -205,72 +388,68 @@ class StockAnalyzer:
 
     def calculate_atr(self, df, period):
         """计算ATR指标"""
-        high = df['high']
-        low = df['low']
-        close = df['close'].shift(1)
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        prev_close = df['close'].shift(1).to_numpy(dtype=float)
 
-        tr1 = high - low
-        tr2 = abs(high - close)
-        tr3 = abs(low - close)
-
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        return tr.rolling(window=period).mean()
+        # 直接在数组上逐元素取三种真实波幅的最大值，避免拼接中间DataFrame
+        # fmax忽略首行前收盘价为NaN的情况，与DataFrame.max(axis=1)的行为一致
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        return pd.Series(tr, index=df.index).rolling(window=period).mean()
 
     def format_indicator_data(self, df):
         """格式化指标数据，控制小数位数"""
 
-        # 格式化价格数据 (2位小数)
+        # 各列保留的小数位数：价格和其他技术指标2位，MACD相关指标3位
         price_columns = ['open', 'close', 'high', 'low', 'MA5', 'MA20', 'MA60', 'BB_upper', 'BB_middle', 'BB_lower']
-        for col in price_columns:
-            if col in df.columns:
-                df[col] = df[col].round(2)
-
-        # 格式化MACD相关指标 (3位小数)
         macd_columns = ['MACD', 'Signal', 'MACD_hist']
-        for col in macd_columns:
-            if col in df.columns:
-                df[col] = df[col].round(3)
-
-        # 格式化其他技术指标 (2位小数)
         other_columns = ['RSI', 'Volatility', 'ROC', 'Volume_Ratio']
-        for col in other_columns:
-            if col in df.columns:
-                df[col] = df[col].round(2)
 
-        return df
+        decimals = {col: 2 for col in price_columns + other_columns}
+        decimals.update({col: 3 for col in macd_columns})
+
+        # 一次性按列取整，避免逐列赋值
+        return df.round({col: places for col, places in decimals.items() if col in df.columns})
 
     def calculate_indicators(self, df):
         """计算技术指标"""
 
         try:
+            # 先将各指标计算到字典中，最后一次性合并，避免逐列插入DataFrame
+            close = df['close']
+            indicators = {}
+
             # 计算移动平均线
-            df['MA5'] = self.calculate_ema(df['close'], self.params['ma_periods']['short'])
-            df['MA20'] = self.calculate_ema(df['close'], self.params['ma_periods']['medium'])
-            df['MA60'] = self.calculate_ema(df['close'], self.params['ma_periods']['long'])
+            indicators['MA5'] = self.calculate_ema(close, self.params['ma_periods']['short'])
+            indicators['MA20'] = self.calculate_ema(close, self.params['ma_periods']['medium'])
+            indicators['MA60'] = self.calculate_ema(close, self.params['ma_periods']['long'])
 
             # 计算RSI
-            df['RSI'] = self.calculate_rsi(df['close'], self.params['rsi_period'])
+            indicators['RSI'] = self.calculate_rsi(close, self.params['rsi_period'])
 
             # 计算MACD
-            df['MACD'], df['Signal'], df['MACD_hist'] = self.calculate_macd(df['close'])
+            indicators['MACD'], indicators['Signal'], indicators['MACD_hist'] = self.calculate_macd(close)
 
             # 计算布林带
-            df['BB_upper'], df['BB_middle'], df['BB_lower'] = self.calculate_bollinger_bands(
-                df['close'],
+            indicators['BB_upper'], indicators['BB_middle'], indicators['BB_lower'] = self.calculate_bollinger_bands(
+                close,
                 self.params['bollinger_period'],
                 self.params['bollinger_std']
             )
 
             # 成交量分析
-            df['Volume_MA'] = df['volume'].rolling(window=self.params['volume_ma_period']).mean()
-            df['Volume_Ratio'] = df['volume'] / df['Volume_MA']
+            indicators['Volume_MA'] = df['volume'].rolling(window=self.params['volume_ma_period']).mean()
+            indicators['Volume_Ratio'] = df['volume'] / indicators['Volume_MA']
 
             # 计算ATR和波动率
-            df['ATR'] = self.calculate_atr(df, self.params['atr_period'])
-            df['Volatility'] = df['ATR'] / df['close'] * 100
+            indicators['ATR'] = self.calculate_atr(df, self.params['atr_period'])
+            indicators['Volatility'] = indicators['ATR'] / close * 100
 
             # 动量指标
-            df['ROC'] = df['close'].pct_change(periods=10) * 100
+            indicators['ROC'] = close.pct_change(periods=10) * 100
+
+            df = pd.concat([df.drop(columns=list(indicators), errors='ignore'),
+                            pd.DataFrame(indicators, index=df.index)], axis=1)
 
             # 格式化数据
             df = self.format_indicator_data(df)
@@ -512,11 +691,11 @@ class StockAnalyzer:
         try:
             # Get stock data
             df = self.get_stock_data(stock_code)
-            df = self.calculate_indicators(df)
 
             # 获取波动率因子（来自维度3：能量守恒）
-            latest = df.iloc[-1]
-            volatility = latest['Volatility']
+            # 只需最新的波动率，直接由ATR计算，无需计算全部技术指标（保留2位小数，与calculate_indicators一致）
+            atr = self.calculate_atr(df, self.params['atr_period'])
+            volatility = round(atr.iloc[-1] / df['close'].iloc[-1] * 100, 2)
 
             # 计算波动率调整因子（较高波动率=较小仓位）
             volatility_factor = 1.0
@@ -837,7 +1016,6 @@ class StockAnalyzer:
             import threading
             import json
             import openai
-            import requests
 
             result_queue = queue.Queue()
 
@@ -873,7 +1051,7 @@ class StockAnalyzer:
                             "num": limit * 2  # 获取更多结果以便筛选
                         }
 
-                        response = requests.get(url, params=params)
+                        response = http_session.get(url, params=params)
                         search_results = response.json()
 
                         # 提取新闻结果
@@ -896,7 +1074,7 @@ class StockAnalyzer:
                             "num": limit
                         }
 
-                        industry_response = requests.get(url, params=industry_params)
+                        industry_response = http_session.get(url, params=industry_params)
                         industry_results = industry_response.json()
 
                         # 提取行业新闻
@@ -1221,12 +1399,13 @@ class StockAnalyzer:
             recent_data = df.tail(20).to_dict('records')
 
             # 2. 计算技术指标摘要
+            latest = df.iloc[-1]
             technical_summary = {
-                'trend': 'upward' if df.iloc[-1]['MA5'] > df.iloc[-1]['MA20'] else 'downward',
-                'volatility': f"{df.iloc[-1]['Volatility']:.2f}%",
-                'volume_trend': 'increasing' if df.iloc[-1]['Volume_Ratio'] > 1 else 'decreasing',
-                'rsi_level': df.iloc[-1]['RSI'],
-                'macd_signal': 'bullish' if df.iloc[-1]['MACD'] > df.iloc[-1]['Signal'] else 'bearish',
+                'trend': 'upward' if latest['MA5'] > latest['MA20'] else 'downward',
+                'volatility': f"{latest['Volatility']:.2f}%",
+                'volume_trend': 'increasing' if latest['Volume_Ratio'] > 1 else 'decreasing',
+                'rsi_level': latest['RSI'],
+                'macd_signal': 'bullish' if latest['MACD'] > latest['Signal'] else 'bearish',
                 'bb_position': self._calculate_bb_position(df)
             }
 
@@ -1251,7 +1430,7 @@ class StockAnalyzer:
             tech_data = {
                 'RSI': technical_summary['rsi_level'],
                 'MACD_signal': technical_summary['macd_signal'],
-                'Volatility': df.iloc[-1]['Volatility']
+                'Volatility': latest['Volatility']
             }
             recommendation = self.get_recommendation(score, market_type, tech_data, news_data)
 
@@ -1463,6 +1642,12 @@ class StockAnalyzer:
     def scan_market(self, stock_list, min_score=60, market_type='A'):
         """扫描市场，寻找符合条件的股票"""
         recommendations = []
+
+        # 未知代码必然分析失败，提前剔除，不为其提交任务
+        stock_list, unknown_codes = filter_known_stock_codes(stock_list, market_type)
+        if unknown_codes:
+            self.logger.warning(f"跳过 {len(unknown_codes)} 只未知股票代码: {unknown_codes}")
+
         total_stocks = len(stock_list)
 
         self.logger.info(f"开始市场扫描，共 {total_stocks} 只股票")
@@ -1478,7 +1663,7 @@ class StockAnalyzer:
             for stock_code in batch:
                 try:
                     # 使用简化版分析以加快速度
-                    report = self.quick_analyze_stock(stock_code, market_type)
+                    report = self.quick_analyze_stock(stock_code, market_type, min_score)
                     if report['score'] >= min_score:
                         batch_results.append(report)
                 except Exception as e:
@@ -1505,54 +1690,11 @@ class StockAnalyzer:
 
         return recommendations
 
-    # def quick_analyze_stock(self, stock_code, market_type='A'):
-    #     """快速分析股票，用于市场扫描"""
-    #     try:
-    #         # 获取股票数据
-    #         df = self.get_stock_data(stock_code, market_type)
-
-    #         # 计算技术指标
-    #         df = self.calculate_indicators(df)
-
-    #         # 简化评分计算
-    #         score = self.calculate_score(df)
-
-    #         # 获取最新数据
-    #         latest = df.iloc[-1]
-    #         prev = df.iloc[-2] if len(df) > 1 else latest
-
-    #         # 尝试获取股票名称和行业
-    #         try:
-    #             stock_info = self.get_stock_info(stock_code)
-    #             stock_name = stock_info.get('股票名称', '未知')
-    #             industry = stock_info.get('行业', '未知')
-    #         except:
-    #             stock_name = '未知'
-    #             industry = '未知'
-
-    #         # 生成简化报告
-    #         report = {
-    #             'stock_code': stock_code,
-    #             'stock_name': stock_name,
-    #             'industry': industry,
-    #             'analysis_date': datetime.now().strftime('%Y-%m-%d'),
-    #             'score': score,
-    #             'price': float(latest['close']),
-    #             'price_change': float((latest['close'] - prev['close']) / prev['close'] * 100),
-    #             'ma_trend': 'UP' if latest['MA5'] > latest['MA20'] else 'DOWN',
-    #             'rsi': float(latest['RSI']),
-    #             'macd_signal': 'BUY' if latest['MACD'] > latest['Signal'] else 'SELL',
-    #             'volume_status': '放量' if latest['Volume_Ratio'] > 1.5 else '平量',
-    #             'recommendation': self.get_recommendation(score)
-    #         }
-
-    #         return report
-    #     except Exception as e:
-    #         self.logger.error(f"快速分析股票 {stock_code} 时出错: {str(e)}")
-    #         raise
-
-    def quick_analyze_stock(self, stock_code, market_type='A'):
-        """快速分析股票，用于市场扫描"""
+    def quick_analyze_stock(self, stock_code, market_type='A', min_score=None):
+        """快速分析股票，用于市场扫描
+
+        指定min_score时，评分低于该值的股票不再请求股票基本信息，直接返回评分结果
+        """
         try:
             # 获取股票数据
             df = self.get_stock_data(stock_code, market_type)
@@ -1563,6 +1705,10 @@ class StockAnalyzer:
             # 简化评分计算
             score = self.calculate_score(df)
 
+            # 评分未达标时提前返回，省去获取股票信息的网络请求
+            if min_score is not None and score < min_score:
+                return {'stock_code': stock_code, 'score': score}
+
             # 获取最新数据
             latest = df.iloc[-1]
             prev = df.iloc[-2] if len(df) > 1 else latest
@@ -1615,43 +1761,17 @@ class StockAnalyzer:
             # 获取A股股票基本信息
             stock_info = ak.stock_individual_info_em(symbol=stock_code)
 
-            # 修改：使用列名而不是索引访问数据
+            # 第一列为字段名、第二列为字段值，按列整体组装字典
             info_dict = {}
-            for _, row in stock_info.iterrows():
-                # 使用iloc安全地获取数据
-                if len(row) >= 2:  # 确保有至少两列
-                    info_dict[row.iloc[0]] = row.iloc[1]
+            if stock_info.shape[1] >= 2:  # 确保有至少两列
+                info_dict = dict(zip(stock_info.iloc[:, 0], stock_info.iloc[:, 1]))
 
-            # 获取股票名称
+            # 获取股票名称（代码与名称映射在进程内共享，按天缓存）
             try:
-                stock_name = ak.stock_info_a_code_name()
-
-                # 检查数据框是否包含预期的列
-                if '代码' in stock_name.columns and '名称' in stock_name.columns:
-                    # 尝试找到匹配的股票代码
-                    matched_stocks = stock_name[stock_name['代码'] == stock_code]
-                    if not matched_stocks.empty:
-                        name = matched_stocks['名称'].values[0]
-                    else:
-                        self.logger.warning(f"未找到股票代码 {stock_code} 的名称信息")
-                        name = "未知"
-                else:
-                    # 尝试使用不同的列名
-                    possible_code_columns = ['代码', 'code', 'symbol', '股票代码', 'stock_code']
-                    possible_name_columns = ['名称', 'name', '股票名称', 'stock_name']
-
-                    code_col = next((col for col in possible_code_columns if col in stock_name.columns), None)
-                    name_col = next((col for col in possible_name_columns if col in stock_name.columns), None)
-
-                    if code_col and name_col:
-                        matched_stocks = stock_name[stock_name[code_col] == stock_code]
-                        if not matched_stocks.empty:
-                            name = matched_stocks[name_col].values[0]
-                        else:
-                            name = "未知"
-                    else:
-                        self.logger.warning(f"股票信息DataFrame结构不符合预期: {stock_name.columns.tolist()}")
-                        name = "未知"
+                name = get_code_name_map().get(stock_code)
+                if name is None:
+                    self.logger.warning(f"未找到股票代码 {stock_code} 的名称信息")
+                    name = "未知"
             except Exception as e:
                 self.logger.error(f"获取股票名称时出错: {str(e)}")
                 name = "未知"
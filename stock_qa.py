@@ -376,7 +376,8 @@ class StockQA:
             # 使用SERP API搜索
             if self.serp_api_key:
                 try:
-                    import requests
+                    # 复用共享的HTTP会话（连接池+自动重试）
+                    from stock_analyzer import http_session
                     
                     # 构建搜索查询
                     search_query = f"{stock_name} {stock_code} {market_name} {query}"
@@ -391,7 +392,7 @@ class StockQA:
                         "num": 5  # 获取5条结果
                     }
                     
-                    response = requests.get(url, params=params)
+                    response = http_session.get(url, params=params)
                     search_results = response.json()
                     
                     # 提取新闻结果
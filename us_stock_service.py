@@ -8,6 +8,7 @@
 import akshare as ak
 import pandas as pd
 import logging
+from datetime import datetime
 
 
 class USStockService:
@@ -16,6 +17,10 @@ class USStockService:
                             format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
+        # 缓存美股行情表，避免每次搜索都重新下载全市场数据
+        self.data_cache = {}
+        self.spot_cache_ttl = 300
+
     def search_us_stocks(self, keyword):
         """
         搜索美股代码
@@ -23,45 +28,56 @@ class USStockService:
         :return: 匹配的股票列表
         """
         try:
-            # 获取美股数据
-            df = ak.stock_us_spot_em()
-
-            # 转换列名
-            df = df.rename(columns={
-                "序号": "index",
-                "名称": "name",
-                "最新价": "price",
-                "涨跌额": "price_change",
-                "涨跌幅": "price_change_percent",
-                "开盘价": "open",
-                "最高价": "high",
-                "最低价": "low",
-                "昨收价": "pre_close",
-                "总市值": "market_value",
-                "市盈率": "pe_ratio",
-                "成交量": "volume",
-                "成交额": "turnover",
-                "振幅": "amplitude",
-                "换手率": "turnover_rate",
-                "代码": "symbol"
-            })
+            df = self._get_us_spot_data()
 
-            # 模糊匹配搜索
-            mask = df['name'].str.contains(keyword, case=False, na=False)
+            # 模糊匹配搜索（按普通字符串匹配）
+            mask = df['name'].str.contains(keyword, case=False, na=False, regex=False)
             results = df[mask]
 
-            # 格式化返回结果并处理 NaN 值
-            formatted_results = []
-            for _, row in results.iterrows():
-                formatted_results.append({
-                    'name': row['name'] if pd.notna(row['name']) else '',
-                    'symbol': str(row['symbol']) if pd.notna(row['symbol']) else '',
-                    'price': float(row['price']) if pd.notna(row['price']) else 0.0,
-                    'market_value': float(row['market_value']) if pd.notna(row['market_value']) else 0.0
-                })
+            # 按列格式化返回结果并处理 NaN 值
+            formatted = pd.DataFrame({
+                'name': results['name'].where(results['name'].notna(), ''),
+                'symbol': results['symbol'].astype(str).where(results['symbol'].notna(), ''),
+                'price': pd.to_numeric(results['price'], errors='coerce').fillna(0.0).astype(float),
+                'market_value': pd.to_numeric(results['market_value'], errors='coerce').fillna(0.0).astype(float)
+            })
 
-            return formatted_results
+            return formatted.to_dict('records')
 
         except Exception as e:
             self.logger.error(f"搜索美股代码时出错: {str(e)}")
-            raise Exception(f"搜索美股代码失败: {str(e)}")
\ No newline at end of file
+            raise Exception(f"搜索美股代码失败: {str(e)}")
+
+    def _get_us_spot_data(self):
+        """获取美股实时行情表（已转换列名），在缓存有效期内复用"""
+        cache_key = "us_spot"
+        if cache_key in self.data_cache:
+            cache_time, cached_data = self.data_cache[cache_key]
+            if (datetime.now() - cache_time).total_seconds() < self.spot_cache_ttl:
+                return cached_data
+
+        # 获取美股数据
+        df = ak.stock_us_spot_em()
+
+        # 转换列名
+        df = df.rename(columns={
+            "序号": "index",
+            "名称": "name",
+            "最新价": "price",
+            "涨跌额": "price_change",
+            "涨跌幅": "price_change_percent",
+            "开盘价": "open",
+            "最高价": "high",
+            "最低价": "low",
+            "昨收价": "pre_close",
+            "总市值": "market_value",
+            "市盈率": "pe_ratio",
+            "成交量": "volume",
+            "成交额": "turnover",
+            "振幅": "amplitude",
+            "换手率": "turnover_rate",
+            "代码": "symbol"
+        })
+
+        self.data_cache[cache_key] = (datetime.now(), df)
+        return df
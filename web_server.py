@@ -9,7 +9,7 @@
 import numpy as np
 import pandas as pd
 from flask import Flask, render_template, request, jsonify, redirect, url_for
-from stock_analyzer import StockAnalyzer
+from stock_analyzer import StockAnalyzer, normalize_stock_codes, filter_known_stock_codes
 from us_stock_service import USStockService
 import threading
 import logging
@@ -17,12 +17,12 @@ from logging.handlers import RotatingFileHandler
 import traceback
 import os
 import json
+import re
 from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from flask_cors import CORS
 import time
 from flask_caching import Cache
-import threading
-import sys
 from flask_swagger_ui import get_swaggerui_blueprint
 from database import get_session, StockInfo, AnalysisResult, Portfolio, USE_DATABASE
 from dotenv import load_dotenv
@@ -77,17 +77,6 @@ cache.init_app(app)
 
 app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
-# 确保全局变量在重新加载时不会丢失
-if 'analyzer' not in globals():
-    try:
-        from stock_analyzer import StockAnalyzer
-
-        analyzer = StockAnalyzer()
-        print("成功初始化全局StockAnalyzer实例")
-    except Exception as e:
-        print(f"初始化StockAnalyzer时出错: {e}", file=sys.stderr)
-        raise
-
 # 初始化模块实例
 fundamental_analyzer = FundamentalAnalyzer()
 capital_flow_analyzer = CapitalFlowAnalyzer()
@@ -409,8 +398,8 @@ def index():
 def analyze():
     try:
         data = request.json
-        stock_codes = data.get('stock_codes', [])
         market_type = data.get('market_type', 'A')
+        stock_codes = normalize_stock_codes(data.get('stock_codes') or [], market_type)
 
         if not stock_codes:
             return jsonify({'error': '请输入代码'}), 400
@@ -433,7 +422,7 @@ def analyze():
 
                 # 使用线程本地缓存的分析器实例
                 current_analyzer = get_analyzer()
-                result = current_analyzer.quick_analyze_stock(stock_code.strip(), market_type)
+                result = current_analyzer.quick_analyze_stock(stock_code, market_type)
 
                 app.logger.info(
                     f"分析结果: 股票={stock_code}, 名称={result.get('stock_name', '未知')}, 行业={result.get('industry', '未知')}")
@@ -836,16 +825,13 @@ def get_stock_data():
                 if pd.api.types.is_datetime64_any_dtype(df['date']):
                     df['date'] = df['date'].dt.strftime('%Y-%m-%d')
                 else:
-                    df = df.copy()
                     df['date'] = pd.to_datetime(df['date'], errors='coerce')
                     df['date'] = df['date'].dt.strftime('%Y-%m-%d')
             except Exception as e:
                 app.logger.error(f"处理日期列时出错: {str(e)}")
                 df['date'] = df['date'].astype(str)
 
-        # 将NaN值替换为None
-        df = df.replace({np.nan: None, np.inf: None, -np.inf: None})
-
+        # NaN和无穷值由custom_jsonify中的convert_numpy_types统一转换为None，无需再复制整个DataFrame替换
         records = df.to_dict('records')
 
         app.logger.info(f"数据处理完成，返回 {len(records)} 条记录")
@@ -856,72 +842,27 @@ def get_stock_data():
         return custom_jsonify({'error': str(e)}), 500
 
 
-# @app.route('/api/market_scan', methods=['POST'])
-# def api_market_scan():
-#     try:
-#         data = request.json
-#         stock_list = data.get('stock_list', [])
-#         min_score = data.get('min_score', 60)
-#         market_type = data.get('market_type', 'A')
-
-#         if not stock_list:
-#             return jsonify({'error': '请提供股票列表'}), 400
-
-#         # 限制股票数量，避免过长处理时间
-#         if len(stock_list) > 100:
-#             app.logger.warning(f"股票列表过长 ({len(stock_list)}只)，截取前100只")
-#             stock_list = stock_list[:100]
-
-#         # 执行市场扫描
-#         app.logger.info(f"开始扫描 {len(stock_list)} 只股票，最低分数: {min_score}")
-
-#         # 使用线程池优化处理
-#         results = []
-#         max_workers = min(10, len(stock_list))  # 最多10个工作线程
-
-#         # 设置较长的超时时间
-#         timeout = 300  # 5分钟
-
-#         def scan_thread():
-#             try:
-#                 return analyzer.scan_market(stock_list, min_score, market_type)
-#             except Exception as e:
-#                 app.logger.error(f"扫描线程出错: {str(e)}")
-#                 return []
-
-#         thread = threading.Thread(target=lambda: results.append(scan_thread()))
-#         thread.start()
-#         thread.join(timeout)
-
-#         if thread.is_alive():
-#             app.logger.error(f"市场扫描超时，已扫描 {len(stock_list)} 只股票超过 {timeout} 秒")
-#             return custom_jsonify({'error': '扫描超时，请减少股票数量或稍后再试'}), 504
-
-#         if not results or not results[0]:
-#             app.logger.warning("扫描结果为空")
-#             return custom_jsonify({'results': []})
-
-#         scan_results = results[0]
-#         app.logger.info(f"扫描完成，找到 {len(scan_results)} 只符合条件的股票")
-
-#         # 使用自定义JSON格式处理NumPy数据类型
-#         return custom_jsonify({'results': scan_results})
-#     except Exception as e:
-#         app.logger.error(f"执行市场扫描时出错: {traceback.format_exc()}")
-#         return custom_jsonify({'error': str(e)}), 500
-
 @app.route('/api/start_market_scan', methods=['POST'])
 def start_market_scan():
     """启动市场扫描任务"""
     try:
         data = request.json
-        stock_list = data.get('stock_list', [])
         min_score = data.get('min_score', 60)
         market_type = data.get('market_type', 'A')
+        # 统一规范化并去重，避免同一股票重复分析
+        stock_list = normalize_stock_codes(data.get('stock_list') or [], market_type)
 
         if not stock_list:
             return jsonify({'error': '请提供股票列表'}), 400
 
+        # 未知代码必然分析失败，创建任务前剔除，避免无谓的网络请求和重试
+        stock_list, skipped_codes = filter_known_stock_codes(stock_list, market_type)
+        if skipped_codes:
+            app.logger.warning(f"跳过 {len(skipped_codes)} 只未知股票代码: {skipped_codes}")
+
+        if not stock_list:
+            return jsonify({'error': '未找到有效的股票代码', 'skipped_codes': skipped_codes}), 400
+
         # 限制股票数量，避免过长处理时间
         if len(stock_list) > 100:
             app.logger.warning(f"股票列表过长 ({len(stock_list)}只)，截取前100只")
@@ -938,6 +879,7 @@ def start_market_scan():
             'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'params': {
                 'stock_list': stock_list,
+                'skipped_codes': skipped_codes,
                 'min_score': min_score,
                 'market_type': market_type
             }
@@ -951,34 +893,43 @@ def start_market_scan():
             try:
                 start_market_scan_task_status(task_id, TASK_RUNNING)
 
-                # 执行分批处理
+                def analyze_one(stock_code):
+                    try:
+                        return analyzer.quick_analyze_stock(stock_code, market_type, min_score)
+                    except Exception as e:
+                        app.logger.error(f"分析股票 {stock_code} 时出错: {str(e)}")
+                        return None
+
+                # 始终保持batch_size只股票在并发分析（耗时主要在网络请求），
+                # 任一只完成即补充下一只，不再等待整批中最慢的股票
                 results = []
                 total = len(stock_list)
                 batch_size = 10
-
-                for i in range(0, total, batch_size):
-                    if task_id not in scan_tasks or scan_tasks[task_id]['status'] != TASK_RUNNING:
-                        # 任务被取消
-                        app.logger.info(f"扫描任务 {task_id} 被取消")
-                        return
-
-                    batch = stock_list[i:i + batch_size]
-                    batch_results = []
-
-                    for stock_code in batch:
-                        try:
-                            report = analyzer.quick_analyze_stock(stock_code, market_type)
-                            if report['score'] >= min_score:
-                                batch_results.append(report)
-                        except Exception as e:
-                            app.logger.error(f"分析股票 {stock_code} 时出错: {str(e)}")
-                            continue
-
-                    results.extend(batch_results)
-
-                    # 更新进度
-                    progress = min(100, int((i + len(batch)) / total * 100))
-                    start_market_scan_task_status(task_id, TASK_RUNNING, progress=progress)
+                processed = 0
+                remaining_codes = iter(stock_list[batch_size:])
+
+                with ThreadPoolExecutor(max_workers=batch_size) as executor:
+                    running = {executor.submit(analyze_one, stock_code) for stock_code in stock_list[:batch_size]}
+                    while running:
+                        if task_id not in scan_tasks or scan_tasks[task_id]['status'] != TASK_RUNNING:
+                            # 任务被取消
+                            app.logger.info(f"扫描任务 {task_id} 被取消")
+                            return
+
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            report = future.result()
+                            if report and report['score'] >= min_score:
+                                results.append(report)
+
+                            next_code = next(remaining_codes, None)
+                            if next_code is not None:
+                                running.add(executor.submit(analyze_one, next_code))
+
+                        # 更新进度
+                        processed += len(done)
+                        progress = min(100, int(processed / total * 100))
+                        start_market_scan_task_status(task_id, TASK_RUNNING, progress=progress)
 
                 # 按得分排序
                 results.sort(key=lambda x: x['score'], reverse=True)
@@ -1000,7 +951,8 @@ def start_market_scan():
         return jsonify({
             'task_id': task_id,
             'status': 'pending',
-            'message': f'已启动扫描任务，正在处理 {len(stock_list)} 只股票'
+            'message': f'已启动扫描任务，正在处理 {len(stock_list)} 只股票',
+            'skipped_codes': skipped_codes
         })
 
     except Exception as e:
@@ -1023,6 +975,7 @@ def get_scan_status(task_id):
             'status': task['status'],
             'progress': task.get('progress', 0),
             'total': task.get('total', 0),
+            'skipped_codes': task.get('params', {}).get('skipped_codes', []),
             'created_at': task['created_at'],
             'updated_at': task['updated_at']
         }
@@ -1143,14 +1096,20 @@ def clean_old_tasks():
         return len(to_delete)
 
 
+# 收盘后清理缓存的时间窗口（当天的分钟数，16:25-16:35）
+MARKET_CLOSE_CLEAN_START = 16 * 60 + 25
+MARKET_CLOSE_CLEAN_END = 16 * 60 + 35
+
+
 # 修改 run_task_cleaner 函数，使其每 5 分钟运行一次并在 16:30 左右清理所有缓存
 def run_task_cleaner():
     """定期运行任务清理，并在每天 16:30 左右清理所有缓存"""
     while True:
         try:
             now = datetime.now()
-            # 判断是否在收盘时间附近（16:25-16:35）
-            is_market_close_time = (now.hour == 16 and 25 <= now.minute <= 35)
+            # 判断是否在收盘时间附近（16:25-16:35），按当天的分钟数比较
+            minute_of_day = now.hour * 60 + now.minute
+            is_market_close_time = MARKET_CLOSE_CLEAN_START <= minute_of_day <= MARKET_CLOSE_CLEAN_END
 
             cleaned = clean_old_tasks()
 
@@ -1528,6 +1487,112 @@ def get_history_analysis():
         if session:
             session.close()
 
+
+# 重要新闻关键词
+IMPORTANT_NEWS_KEYWORDS = ['重要', '利好', '重磅', '突发', '关注']
+
+# 舆情热点关键词
+HOTSPOT_KEYWORDS = [
+    # 舆情直接相关词
+    '舆情', '舆论', '热点', '热议', '热搜', '话题',
+
+    # 关注度相关词
+    '关注度', '高度关注', '引发关注', '市场关注', '持续关注', '重点关注',
+    '密切关注', '广泛关注', '集中关注', '投资者关注',
+
+    # 传播相关词
+    '爆文', '刷屏', '刷爆', '冲上热搜', '纷纷转发', '广泛传播',
+    '热传', '病毒式传播', '迅速扩散', '高度转发',
+
+    # 社交媒体相关词
+    '微博热搜', '微博话题', '知乎热议', '抖音热门', '今日头条', '朋友圈热议',
+    '微信热文', '社交媒体热议', 'APP热榜',
+
+    # 情绪相关词
+    '情绪高涨', '市场情绪', '投资情绪', '恐慌情绪', '亢奋情绪',
+    '乐观情绪', '悲观情绪', '投资者情绪', '公众情绪',
+
+    # 突发事件相关
+    '突发', '紧急', '爆发', '突现', '紧急事态', '快讯', '突发事件',
+    '重大事件', '意外事件', '突发新闻',
+
+    # 行业动态相关
+    '行业动向', '市场动向', '板块轮动', '资金流向', '产业趋势',
+    '政策导向', '监管动态', '风口', '市场风向',
+
+    # 舆情分析相关
+    '舆情分析', '舆情监测', '舆情报告', '舆情数据', '舆情研判',
+    '舆情趋势', '舆情预警', '舆情通报', '舆情简报',
+
+    # 市场焦点相关
+    '市场焦点', '焦点话题', '焦点股', '焦点事件', '投资焦点',
+    '关键词', '今日看点', '重点关切', '核心议题',
+
+    # 传统媒体相关
+    '头版头条', '财经头条', '要闻', '重磅新闻', '独家报道',
+    '深度报道', '特别关注', '重点报道', '专题报道',
+
+    # 特殊提示词
+    '投资舆情', '今日舆情', '今日热点', '投资热点', '市场热点',
+    '每日热点', '关注要点', '交易热点', '今日重点',
+
+    # AI基础技术
+    '人工智能', 'AI', '机器学习', '深度学习', '神经网络', '大模型',
+    'LLM', '大语言模型', '生成式AI', '生成式人工智能', '算法',
+
+    # AI细分技术
+    '自然语言处理', 'NLP', '计算机视觉', 'CV', '语音识别',
+    '图像生成', '多模态', '强化学习', '联邦学习', '知识图谱',
+    '边缘计算', '量子计算', '类脑计算', '神经形态计算',
+
+    # 热门AI模型/产品
+    'GPT', 'GPT-4', 'GPT-5', 'GPT-4o', 'ChatGPT', 'Claude',
+    'Gemini', 'Llama', 'Llama3', 'Stable Diffusion', 'DALL-E',
+    'Midjourney', 'Sora', 'Anthropic', 'Runway', 'Copilot',
+    'Bard', 'GLM', 'Ernie', '文心一言', '通义千问', '讯飞星火','DeepSeek',
+
+    # AI应用领域
+    'AIGC', '智能驾驶', '自动驾驶', '智能助手', '智能医疗',
+    '智能制造', '智能客服', '智能金融', '智能教育',
+    '智能家居', '机器人', 'RPA', '数字人', '虚拟人',
+    '智能安防', '计算机辅助',
+
+    # AI硬件
+    'AI芯片', 'GPU', 'TPU', 'NPU', 'FPGA', '算力', '推理芯片',
+    '训练芯片', 'NVIDIA', '英伟达', 'AMD', '高性能计算',
+
+    # AI企业
+    'OpenAI', '微软AI', '谷歌AI', 'Google DeepMind', 'Meta AI',
+    '百度智能云', '阿里云AI', '腾讯AI', '华为AI', '商汤科技',
+    '旷视科技', '智源人工智能', '云从科技', '科大讯飞',
+
+    # AI监管/伦理
+    'AI监管', 'AI伦理', 'AI安全', 'AI风险', 'AI治理',
+    'AI对齐', 'AI偏见', 'AI隐私', 'AGI', '通用人工智能',
+    '超级智能', 'AI法规', 'AI责任', 'AI透明度',
+
+    # AI市场趋势
+    'AI创业', 'AI投资', 'AI融资', 'AI估值', 'AI泡沫',
+    'AI风口', 'AI赛道', 'AI产业链', 'AI应用落地', 'AI转型',
+    'AI红利', 'AI市值', 'AI概念股',
+
+    # 新兴AI概念
+    'AI Agent', 'AI智能体', '多智能体', '自主AI',
+    'AI搜索引擎', 'RAG', '检索增强生成', '思维链', 'CoT',
+    '大模型微调', '提示工程', 'Prompt Engineering',
+    '基础模型', 'Foundation Model', '小模型', '专用模型',
+
+    # 人工智能舆情专用
+    'AI热点', 'AI风潮', 'AI革命', 'AI热议', 'AI突破',
+    'AI进展', 'AI挑战', 'AI竞赛', 'AI战略', 'AI政策',
+    'AI风险', 'AI恐慌', 'AI威胁', 'AI机遇'
+]
+
+# 将关键词合并为一个预编译的正则，每条新闻只需扫描一次文本
+IMPORTANT_NEWS_PATTERN = re.compile('|'.join(map(re.escape, IMPORTANT_NEWS_KEYWORDS)))
+HOTSPOT_PATTERN = re.compile('|'.join(map(re.escape, HOTSPOT_KEYWORDS)))
+
+
 # 添加新闻API端点
 # 添加到web_server.py文件中
 @app.route('/api/latest_news', methods=['GET'])
@@ -1544,118 +1609,13 @@ def get_latest_news():
         # 过滤新闻
         if only_important:
             # 根据关键词过滤重要新闻
-            important_keywords = ['重要', '利好', '重磅', '突发', '关注']
-            news_data = [news for news in news_data if
-                         any(keyword in (news.get('content', '') or '') for keyword in important_keywords)]
+            news_data = [news for news in news_data if IMPORTANT_NEWS_PATTERN.search(news.get('content', '') or '')]
 
         if news_type == 'hotspot':
             # 过滤舆情热点相关新闻
-            hotspot_keywords = [
-                # 舆情直接相关词
-                '舆情', '舆论', '热点', '热议', '热搜', '话题',
-
-                # 关注度相关词
-                '关注度', '高度关注', '引发关注', '市场关注', '持续关注', '重点关注',
-                '密切关注', '广泛关注', '集中关注', '投资者关注',
-
-                # 传播相关词
-                '爆文', '刷屏', '刷爆', '冲上热搜', '纷纷转发', '广泛传播',
-                '热传', '病毒式传播', '迅速扩散', '高度转发',
-
-                # 社交媒体相关词
-                '微博热搜', '微博话题', '知乎热议', '抖音热门', '今日头条', '朋友圈热议',
-                '微信热文', '社交媒体热议', 'APP热榜',
-
-                # 情绪相关词
-                '情绪高涨', '市场情绪', '投资情绪', '恐慌情绪', '亢奋情绪',
-                '乐观情绪', '悲观情绪', '投资者情绪', '公众情绪',
-
-                # 突发事件相关
-                '突发', '紧急', '爆发', '突现', '紧急事态', '快讯', '突发事件',
-                '重大事件', '意外事件', '突发新闻',
-
-                # 行业动态相关
-                '行业动向', '市场动向', '板块轮动', '资金流向', '产业趋势',
-                '政策导向', '监管动态', '风口', '市场风向',
-
-                # 舆情分析相关
-                '舆情分析', '舆情监测', '舆情报告', '舆情数据', '舆情研判',
-                '舆情趋势', '舆情预警', '舆情通报', '舆情简报',
-
-                # 市场焦点相关
-                '市场焦点', '焦点话题', '焦点股', '焦点事件', '投资焦点',
-                '关键词', '今日看点', '重点关切', '核心议题',
-
-                # 传统媒体相关
-                '头版头条', '财经头条', '要闻', '重磅新闻', '独家报道',
-                '深度报道', '特别关注', '重点报道', '专题报道',
-
-                # 特殊提示词
-                '投资舆情', '今日舆情', '今日热点', '投资热点', '市场热点',
-                '每日热点', '关注要点', '交易热点', '今日重点',
-
-                # AI基础技术
-                '人工智能', 'AI', '机器学习', '深度学习', '神经网络', '大模型',
-                'LLM', '大语言模型', '生成式AI', '生成式人工智能', '算法',
-
-                # AI细分技术
-                '自然语言处理', 'NLP', '计算机视觉', 'CV', '语音识别',
-                '图像生成', '多模态', '强化学习', '联邦学习', '知识图谱',
-                '边缘计算', '量子计算', '类脑计算', '神经形态计算',
-
-                # 热门AI模型/产品
-                'GPT', 'GPT-4', 'GPT-5', 'GPT-4o', 'ChatGPT', 'Claude',
-                'Gemini', 'Llama', 'Llama3', 'Stable Diffusion', 'DALL-E',
-                'Midjourney', 'Sora', 'Anthropic', 'Runway', 'Copilot',
-                'Bard', 'GLM', 'Ernie', '文心一言', '通义千问', '讯飞星火','DeepSeek',
-
-                # AI应用领域
-                'AIGC', '智能驾驶', '自动驾驶', '智能助手', '智能医疗',
-                '智能制造', '智能客服', '智能金融', '智能教育',
-                '智能家居', '机器人', 'RPA', '数字人', '虚拟人',
-                '智能安防', '计算机辅助',
-
-                # AI硬件
-                'AI芯片', 'GPU', 'TPU', 'NPU', 'FPGA', '算力', '推理芯片',
-                '训练芯片', 'NVIDIA', '英伟达', 'AMD', '高性能计算',
-
-                # AI企业
-                'OpenAI', '微软AI', '谷歌AI', 'Google DeepMind', 'Meta AI',
-                '百度智能云', '阿里云AI', '腾讯AI', '华为AI', '商汤科技',
-                '旷视科技', '智源人工智能', '云从科技', '科大讯飞',
-
-                # AI监管/伦理
-                'AI监管', 'AI伦理', 'AI安全', 'AI风险', 'AI治理',
-                'AI对齐', 'AI偏见', 'AI隐私', 'AGI', '通用人工智能',
-                '超级智能', 'AI法规', 'AI责任', 'AI透明度',
-
-                # AI市场趋势
-                'AI创业', 'AI投资', 'AI融资', 'AI估值', 'AI泡沫',
-                'AI风口', 'AI赛道', 'AI产业链', 'AI应用落地', 'AI转型',
-                'AI红利', 'AI市值', 'AI概念股',
-
-                # 新兴AI概念
-                'AI Agent', 'AI智能体', '多智能体', '自主AI',
-                'AI搜索引擎', 'RAG', '检索增强生成', '思维链', 'CoT',
-                '大模型微调', '提示工程', 'Prompt Engineering',
-                '基础模型', 'Foundation Model', '小模型', '专用模型',
-
-                # 人工智能舆情专用
-                'AI热点', 'AI风潮', 'AI革命', 'AI热议', 'AI突破',
-                'AI进展', 'AI挑战', 'AI竞赛', 'AI战略', 'AI政策',
-                'AI风险', 'AI恐慌', 'AI威胁', 'AI机遇'
-            ]
-
-            # 在API处理中使用
-            if news_type == 'hotspot':
-                # 过滤舆情热点相关新闻
-                def has_keyword(item):
-                    title = item.get('title', '')
-                    content = item.get('content', '')
-                    return any(keyword in title for keyword in hotspot_keywords) or \
-                        any(keyword in content for keyword in hotspot_keywords)
-
-                news_data = [news for news in news_data if has_keyword(news)]
+            news_data = [news for news in news_data if
+                         HOTSPOT_PATTERN.search(news.get('title', '') or '') or
+                         HOTSPOT_PATTERN.search(news.get('content', '') or '')]
 
         return jsonify({'success': True, 'news': news_data})
     except Exception as e: